@@ -0,0 +1,355 @@
+"""
+Banco de pruebas de rendimiento reproducible del SGB.
+
+Siembra una BD SQLite a la escala pedida (libros, usuarios y préstamos con sesgo
+realista de popularidad y categorías), recorre las rutas reales de app.py con el
+cliente de pruebas de Flask y reporta latencia p50/p95/p99, throughput y número de
+consultas SQL por petición. Los resultados se guardan en JSON para comparar corridas.
+
+Uso:
+    python benchmark.py --libros 10000 --usuarios 2000 --prestamos 50000
+    python benchmark.py --libros 100000 --peticiones 300 --salida antes.json
+    python benchmark.py --comparar antes.json despues.json
+    python benchmark.py --mixto --hilos 8 --sin-ajustes --salida sqlite_defecto.json
+    python benchmark.py --mixto --hilos 8 --salida wal.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import threading
+import platform
+import subprocess
+from bisect import bisect
+from itertools import accumulate
+from collections import Counter
+from datetime import datetime, timedelta
+
+CARPETA_DATOS = 'bench_data'
+CATEGORIAS = ['Novela', 'Tecnología', 'Historia', 'Ciencia', 'Poesía', 'Infantil', 'Juvenil', 'Ensayo',
+              'Biografía', 'Arte', 'Filosofía', 'Economía', 'Derecho', 'Medicina', 'Cocina', 'Viajes',
+              'Deportes', 'Música', 'Religión', 'Idiomas']
+PALABRAS = ['Años', 'Soledad', 'Sombra', 'Viento', 'Ciudad', 'Perros', 'Amor', 'Tiempos', 'Cólera',
+            'Código', 'Limpio', 'Historia', 'Breve', 'Mundo', 'Nuevo', 'Casa', 'Espíritus', 'Laberinto',
+            'Noche', 'Río', 'Montaña', 'Corazón', 'Memoria', 'Jardín', 'Secreto', 'Isla', 'Mar', 'Fuego',
+            'Invierno', 'Verano', 'Camino', 'Guerra', 'Paz', 'Silencio', 'Luz', 'Piedra', 'Reino', 'Sueño']
+NOMBRES = ['Gabriel', 'Isabel', 'Julio', 'Laura', 'Mario', 'Elena', 'Jorge', 'Carmen', 'Pablo', 'Rosa']
+APELLIDOS = ['García', 'Allende', 'Cortázar', 'Esquivel', 'Vargas', 'Borges', 'Neruda', 'Mistral', 'Rulfo', 'Paz']
+CREDENCIALES = {'admin': 'Admin$2025', 'biblio': 'Biblio$2025', 'user': 'User$2025'}
+# Línea base de --sin-ajustes: PRAGMAs por defecto de SQLite (journal de reversión, sin espera
+# ante bloqueos) y pool por defecto de SQLAlchemy, sin pre_ping ni reciclado de conexiones
+CONFIG_MOTOR_DEFECTO = {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+                        'SQLITE_CACHE_SIZE': '-2000', 'SQLITE_MMAP_SIZE': '0', 'SQLITE_BUSY_TIMEOUT_MS': '0',
+                        'DB_POOL_PRE_PING': '0', 'DB_POOL_RECYCLE': '-1', 'DB_POOL_SIZE': '5',
+                        'DB_MAX_OVERFLOW': '10', 'DB_POOL_TIMEOUT': '30'}
+
+
+class Zipf:
+    """Muestreo con ley de Zipf sobre una permutación fija de ids: unos pocos elementos
+    concentran la mayoría de los eventos, como ocurre con los libros y lectores reales."""
+    def __init__(self, ids, s, rnd):
+        self.ids = list(ids); rnd.shuffle(self.ids); self.rnd = rnd
+        self.acumulado = list(accumulate(1.0 / (k + 1) ** s for k in range(len(self.ids))))
+
+    def __call__(self):
+        return self.ids[min(bisect(self.acumulado, self.rnd.random() * self.acumulado[-1]), len(self.ids) - 1)]
+
+
+def ruta_bd(args, sufijo=''):
+    nombre = f"bench_{args.libros}_{args.usuarios}_{args.prestamos}_{args.semilla}{sufijo}.db"
+    return os.path.abspath(os.path.join(CARPETA_DATOS, nombre))
+
+
+def insertar_en_bloques(A, tabla, filas, bloque=10000):
+    for i in range(0, len(filas), bloque):
+        A.db.session.execute(tabla.insert(), filas[i:i + bloque])
+    A.db.session.commit()
+
+
+def sembrar(A, args):
+    """Genera la BD de forma determinista a partir de la semilla."""
+    rnd = random.Random(args.semilla)
+    ahora = datetime.now().replace(microsecond=0)
+    A.db.drop_all(); A.migrar_bd()
+    print(f">>> Sembrando {args.libros} libros, {args.usuarios} usuarios y {args.prestamos} préstamos...")
+
+    # Usuarios: uno por rol con credenciales conocidas + lectores con un hash compartido
+    base = []
+    for username, role in (('admin', 'admin'), ('biblio', 'bibliotecario'), ('user', 'usuario')):
+        u = A.User(username=username, role=role); u.set_password(CREDENCIALES[username]); base.append(u)
+    A.db.session.add_all(base); A.db.session.commit()
+    hash_lector = A.generate_password_hash('Lector$2025')
+    insertar_en_bloques(A, A.User.__table__, [
+        {'username': f'lector{i}', 'password_hash': hash_lector, 'role': 'usuario', 'profile_image': 'default.png'}
+        for i in range(args.usuarios)])
+
+    # Libros: categorías con sesgo Zipf, títulos únicos por (título, autor)
+    categoria = Zipf(CATEGORIAS, 1.1, rnd)
+    autores = [f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {i}" for i in range(max(1, args.libros // 5))]
+    insertar_en_bloques(A, A.Book.__table__, [
+        {'title': f"{' '.join(rnd.sample(PALABRAS, rnd.randint(2, 4)))} {i}", 'author': rnd.choice(autores),
+         'category': categoria(), 'stock': rnd.randint(0, 8), 'loan_count': 0,
+         'created_at': ahora - timedelta(days=rnd.randint(0, 5 * 365))}
+        for i in range(args.libros)])
+
+    # Préstamos: lectores y libros con popularidad Zipf; los recientes quedan abiertos
+    ids_usuarios = [i for (i,) in A.db.session.query(A.User.id)]
+    ids_libros = [i for (i,) in A.db.session.query(A.Book.id)]
+    lector, libro = Zipf(ids_usuarios, 0.8, rnd), Zipf(ids_libros, 1.0, rnd)
+    filas = []
+    for _ in range(args.prestamos):
+        prestamo = ahora - timedelta(seconds=rnd.randint(0, 730 * 86400))
+        limite = (prestamo + timedelta(days=rnd.randint(7, 30))).replace(hour=0, minute=0, second=0)
+        devolucion = None; multa = 0
+        if (ahora - prestamo).days > 45 or rnd.random() < 0.5:
+            devolucion = min(ahora, max(prestamo + timedelta(hours=1), limite + timedelta(days=rnd.choice([-5, -2, 0, 0, 1, 3, 6, 12]))))
+            multa = A.calcular_multa_inteligente(prestamo, devolucion, limite)
+        filas.append({'book_id': libro(), 'user_id': lector(), 'loan_date': prestamo,
+                      'expected_return_date': limite, 'actual_return_date': devolucion, 'fine': multa})
+    insertar_en_bloques(A, A.Loan.__table__, filas)
+
+    A.reconstruir_indice_busqueda(); A.recalcular_popularidad(); A.recalcular_estadisticas(); A.recalcular_recomendaciones()
+
+
+def percentil(valores, p):
+    return valores[max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))]
+
+
+def exitosa(status):
+    """Sólo las respuestas 2xx/3xx cuentan para latencia y throughput: un 500 (p. ej. una
+    plantilla que falta) responde muy rápido y falsearía los números."""
+    return 200 <= status < 400
+
+
+def estadisticas_latencia(tiempos, total):
+    """p50/p95/p99, media, máximo y req/s de las peticiones exitosas (None si no hubo ninguna)."""
+    tiempos = sorted(tiempos)
+    if not tiempos: return dict.fromkeys(('p50_ms', 'p95_ms', 'p99_ms', 'media_ms', 'max_ms', 'rps'))
+    return {'p50_ms': round(percentil(tiempos, 50), 3), 'p95_ms': round(percentil(tiempos, 95), 3),
+            'p99_ms': round(percentil(tiempos, 99), 3), 'media_ms': round(sum(tiempos) / len(tiempos), 3),
+            'max_ms': round(tiempos[-1], 3), 'rps': round(len(tiempos) / total, 1)}
+
+
+def cliente(A, username):
+    c = A.app.test_client()
+    c.post('/login', data={'username': username, 'password': CREDENCIALES[username]})
+    return c
+
+
+def escenarios(A, args, rnd):
+    """Lista de (nombre, función que ejecuta una petición y devuelve la respuesta)."""
+    admin, biblio, lector = cliente(A, 'admin'), cliente(A, 'biblio'), cliente(A, 'user')
+    with A.app.app_context():
+        ids_libros = [i for (i,) in A.db.session.query(A.Book.id)]
+        ids_usuarios = [i for (i,) in A.db.session.query(A.User.id)]
+        abiertos = [i for (i,) in A.db.session.query(A.Loan.id).filter(A.Loan.actual_return_date.is_(None))
+                    .order_by(A.Loan.id.desc()).limit(2 * (args.peticiones + args.calentamiento))]
+    libro, usuario = Zipf(ids_libros, 1.0, rnd), Zipf(ids_usuarios, 0.8, rnd)
+    fecha = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
+
+    def login():
+        return A.app.test_client().post('/login', data={'username': 'user', 'password': CREDENCIALES['user']})
+
+    def devolver():
+        return biblio.post(f'/devolver/{abiertos.pop()}') if abiertos else biblio.get('/dashboard')
+
+    lista = [
+        ('login', login),
+        ('dashboard_usuario', lambda: lector.get('/dashboard')),
+        ('dashboard_staff', lambda: admin.get('/dashboard')),
+        ('catalog', lambda: lector.get('/catalog')),
+    ]
+    for sort in ('stock_low', 'stock_high', 'recent', 'available', 'genre', 'popular'):
+        lista.append((f'catalog_{sort}', lambda sort=sort: lector.get(f'/catalog?sort={sort}')))
+    lista += [
+        ('catalog_busqueda', lambda: lector.get(f'/catalog?q={rnd.choice(PALABRAS)}')),
+        ('catalog_busqueda_prefijo', lambda: lector.get(f'/catalog?q={rnd.choice(PALABRAS)[:3]}')),
+        ('catalog_busqueda_popular', lambda: lector.get(f'/catalog?q={rnd.choice(PALABRAS)}&sort=popular')),
+        ('prestar', lambda: biblio.post(f'/prestar/{libro()}', data={'target_user_id': usuario(), 'fecha_devolucion': fecha})),
+        ('devolver', devolver),
+        ('generar_qr', lambda: lector.get(f'/generar_qr/{libro()}')),
+        ('admin_user_loans', lambda: admin.get(f'/admin/user/{usuario()}/loans')),
+    ]
+    return lista
+
+
+def medir(nombre, peticion, args, contador):
+    for _ in range(args.calentamiento): peticion().get_data()
+    tiempos, consultas, estados = [], [], Counter()
+    inicio = time.perf_counter()
+    for _ in range(args.peticiones):
+        contador[0] = 0
+        t0 = time.perf_counter()
+        r = peticion(); r.get_data() # Incluye la generación completa del cuerpo
+        estados[r.status_code] += 1
+        if not exitosa(r.status_code): continue
+        tiempos.append((time.perf_counter() - t0) * 1000); consultas.append(contador[0])
+    total = time.perf_counter() - inicio
+    return {'peticiones': len(tiempos), 'errores_http': args.peticiones - len(tiempos), **estadisticas_latencia(tiempos, total),
+            'consultas_media': round(sum(consultas) / len(consultas), 2) if consultas else None,
+            'consultas_max': max(consultas, default=None), 'estados': {str(k): v for k, v in sorted(estados.items())}}
+
+
+def medir_mixto(A, args, rnd, contador, motor):
+    """Varios mostradores concurrentes durante --duracion segundos. Cada hilo alterna lecturas
+    (catálogo, dashboard, API) y escrituras (prestar/devolver) según --escrituras. Mide el
+    throughput agregado de las respuestas exitosas y cuántas fallaron, por HTTP (4xx/5xx) o en
+    la BD (p. ej. 'database is locked')."""
+    with A.app.app_context():
+        ids_libros = [i for (i,) in A.db.session.query(A.Book.id)]
+        ids_usuarios = [i for (i,) in A.db.session.query(A.User.id)]
+        abiertos = [i for (i,) in A.db.session.query(A.Loan.id).filter(A.Loan.actual_return_date.is_(None))]
+    rnd.shuffle(abiertos)
+    fecha = (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
+    tiempos, estados, lock = [], Counter(), threading.Lock()
+    fin = time.perf_counter() + args.duracion
+
+    def mostrador(semilla):
+        r_local = random.Random(semilla)
+        libro, usuario = Zipf(ids_libros, 1.0, r_local), Zipf(ids_usuarios, 0.8, r_local)
+        biblio, lector = cliente(A, 'biblio'), cliente(A, 'user')
+        lecturas = [lambda: lector.get('/catalog'), lambda: lector.get('/catalog?sort=popular'),
+                    lambda: lector.get('/dashboard'), lambda: lector.get(f'/api/v1/books/{libro()}')]
+        def escritura():
+            if r_local.random() < 0.5:
+                try: return biblio.post(f'/devolver/{abiertos.pop()}')
+                except IndexError: pass # Ya no quedan préstamos abiertos de la siembra
+            return biblio.post(f'/prestar/{libro()}', data={'target_user_id': usuario(), 'fecha_devolucion': fecha})
+        propios, codigos = [], Counter()
+        while time.perf_counter() < fin:
+            peticion = escritura if r_local.random() < args.escrituras else r_local.choice(lecturas)
+            t0 = time.perf_counter()
+            r = peticion(); r.get_data()
+            codigos[r.status_code] += 1
+            if exitosa(r.status_code): propios.append((time.perf_counter() - t0) * 1000)
+        with lock: tiempos.extend(propios); estados.update(codigos)
+
+    from sqlalchemy import event
+    errores = [0]
+    def error_bd(contexto):
+        with lock: errores[0] += 1
+    event.listen(motor, 'handle_error', error_bd)
+    contador[0] = 0
+    hilos = [threading.Thread(target=mostrador, args=(args.semilla + i,)) for i in range(args.hilos)]
+    inicio = time.perf_counter()
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    total = time.perf_counter() - inicio
+    enviadas = sum(estados.values())
+    return {'peticiones': len(tiempos), 'errores_http': enviadas - len(tiempos), 'hilos': args.hilos,
+            'escrituras': args.escrituras, **estadisticas_latencia(tiempos, total),
+            'consultas_media': round(contador[0] / enviadas, 2) if enviadas else None, 'errores_bd': errores[0],
+            'estados': {str(k): v for k, v in sorted(estados.items())}}
+
+
+def ms(valor):
+    return f"{valor:9.2f}" if valor is not None else f"{'—':>9}"
+
+
+def ejecutar(args):
+    """Corre los escenarios y guarda el JSON. Devuelve 1 si alguna respuesta no fue 2xx/3xx."""
+    os.makedirs(CARPETA_DATOS, exist_ok=True)
+    semilla, ruta = ruta_bd(args), ruta_bd(args, '_corrida')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + ruta # Debe fijarse antes de importar app
+    if args.sin_ajustes: os.environ.update(CONFIG_MOTOR_DEFECTO)
+    import app as A
+    from sqlalchemy import event
+
+    with A.app.app_context():
+        # Se siembra una sola vez y cada corrida parte de una copia intacta: prestar y
+        # devolver modifican la BD, y dos corridas deben medir exactamente el mismo estado.
+        if args.resembrar or not os.path.exists(semilla):
+            t0 = time.perf_counter(); sembrar(A, args)
+            A.db.session.remove(); A.db.engine.dispose()
+            shutil.copyfile(ruta, semilla)
+            print(f">>> BD sembrada en {time.perf_counter() - t0:.1f} s: {semilla}")
+        else:
+            A.db.engine.dispose()
+            for extra in ('-wal', '-shm'): # Restos de una corrida anterior en modo WAL
+                if os.path.exists(ruta + extra): os.remove(ruta + extra)
+            shutil.copyfile(semilla, ruta)
+            A.migrar_bd() # Una semilla de una versión anterior recibe las migraciones pendientes
+        motor = A.db.engine
+
+    # Las peticiones se lanzan fuera de cualquier app_context: si hubiera uno activo, Flask
+    # lo reutilizaría y 'g' (con el usuario ya cargado) se compartiría entre peticiones.
+    contador = [0]
+    event.listen(motor, 'before_cursor_execute', lambda *a: contador.__setitem__(0, contador[0] + 1))
+    rnd = random.Random(args.semilla)
+    resultados = {}
+    if args.mixto:
+        resultados['mixto'] = r = medir_mixto(A, args, rnd, contador, motor)
+        print(f"mixto ({r['hilos']} hilos, {r['escrituras']:.0%} escrituras)  p50 {ms(r['p50_ms'])}  p95 {ms(r['p95_ms'])}"
+              f"  p99 {ms(r['p99_ms'])} ms  {r['rps'] or 0:.1f} req/s  {r['errores_bd']} errores BD  {r['estados']}"
+              + (f"  ⚠️ {r['errores_http']} ERRORES HTTP" if r['errores_http'] else ''))
+    for nombre, peticion in ([] if args.mixto else escenarios(A, args, rnd)):
+        if args.solo and nombre not in args.solo: continue
+        resultados[nombre] = r = medir(nombre, peticion, args, contador)
+        print(f"{nombre:28} p50 {ms(r['p50_ms'])}  p95 {ms(r['p95_ms'])}  p99 {ms(r['p99_ms'])} ms"
+              f"  {r['rps'] or 0:8.1f} req/s  {r['consultas_media'] or 0:6.1f} SQL/pet  {r['estados']}"
+              + (f"  ⚠️ {r['errores_http']} ERRORES HTTP" if r['errores_http'] else ''))
+
+    try: commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError: commit = None
+    salida = {'meta': {'fecha': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+                       'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                       'pragmas': A.app.config['SQLITE_PRAGMAS'],
+                       'pool': dict(A.app.config['SQLALCHEMY_ENGINE_OPTIONS']),
+                       'parametros': vars(args)},
+              'escenarios': resultados}
+    archivo = args.salida or f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(archivo, 'w', encoding='utf-8') as f: json.dump(salida, f, ensure_ascii=False, indent=2)
+    print(f">>> Resultados guardados en {archivo}")
+    fallidos = [n for n, r in resultados.items() if r['errores_http']]
+    if fallidos:
+        print(f"❌ Escenarios con respuestas de error (excluidas de las métricas): {', '.join(fallidos)}")
+        return 1
+    return 0
+
+
+def comparar(archivo_a, archivo_b):
+    """Muestra la variación porcentual de cada métrica entre dos corridas."""
+    with open(archivo_a, encoding='utf-8') as f: a = json.load(f)
+    with open(archivo_b, encoding='utf-8') as f: b = json.load(f)
+    print(f"A: {archivo_a} ({a['meta'].get('commit')})   B: {archivo_b} ({b['meta'].get('commit')})")
+    metricas = ('p50_ms', 'p95_ms', 'p99_ms', 'rps', 'consultas_media')
+    print(f"{'escenario':28}" + ''.join(f"{m:>26}" for m in metricas))
+    for nombre in a['escenarios']:
+        if nombre not in b['escenarios']: continue
+        celdas = []
+        for m in metricas:
+            va, vb = a['escenarios'][nombre][m], b['escenarios'][nombre][m]
+            delta = f"{(vb - va) / va * 100:+.0f}%" if va and vb is not None else 'n/a'
+            celdas.append(f"{va!s:>9} → {vb!s:<9} {delta:>5}")
+        print(f"{nombre:28}" + ''.join(f"{c:>26}" for c in celdas))
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument('--libros', type=int, default=10000)
+    p.add_argument('--usuarios', type=int, default=2000)
+    p.add_argument('--prestamos', type=int, default=50000)
+    p.add_argument('--semilla', type=int, default=42)
+    p.add_argument('--peticiones', type=int, default=200, help='Peticiones medidas por escenario.')
+    p.add_argument('--calentamiento', type=int, default=20, help='Peticiones previas no medidas.')
+    p.add_argument('--solo', nargs='*', help='Ejecuta sólo estos escenarios.')
+    p.add_argument('--resembrar', action='store_true', help='Regenera la BD aunque ya exista.')
+    p.add_argument('--salida', help='Archivo JSON de resultados.')
+    p.add_argument('--mixto', action='store_true', help='Carga concurrente de lecturas y escrituras en lugar de los escenarios.')
+    p.add_argument('--hilos', type=int, default=8, help='Mostradores concurrentes en --mixto.')
+    p.add_argument('--duracion', type=float, default=10, help='Segundos de carga en --mixto.')
+    p.add_argument('--escrituras', type=float, default=0.2, help='Fracción de escrituras en --mixto.')
+    p.add_argument('--sin-ajustes', action='store_true', help='Configuración por defecto de SQLite y del pool (journal DELETE, synchronous FULL, sin busy_timeout).')
+    p.add_argument('--comparar', nargs=2, metavar=('A.json', 'B.json'), help='Compara dos corridas guardadas.')
+    args = p.parse_args()
+    if args.comparar: comparar(*args.comparar)
+    else: return ejecutar(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Configuración común de las pruebas: BD SQLite en archivo temporal y plantillas mínimas.
+
+DATABASE_URL debe fijarse antes de importar app (Flask-SQLAlchemy crea el motor al
+importar), y el directorio de trabajo pasa a una carpeta temporal para que las subidas
+y la caché de QR no ensucien el repositorio."""
+import os
+import sys
+import tempfile
+
+import pytest
+from jinja2 import DictLoader
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CARPETA = tempfile.mkdtemp(prefix='sgb_tests_')
+RUTA_BD = os.path.join(CARPETA, 'sgb_test.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + RUTA_BD
+os.chdir(CARPETA)
+sys.path.insert(0, RAIZ)
+
+import app as sgb  # noqa: E402
+
+# Las plantillas HTML no forman parte de estas pruebas: cada una muestra sólo los datos clave
+PLANTILLAS = ['login.html', 'register.html', 'dashboard.html', 'profile.html', 'catalog.html',
+              'admin_users.html', 'admin_user_loans.html']
+sgb.app.jinja_loader = DictLoader({n: "{% for b in books|default([]) %}{{ b.title }}:{{ b.stock }};{% endfor %}" for n in PLANTILLAS})
+
+CREDENCIALES = {'admin': 'Admin$2025', 'biblio': 'Biblio$2025', 'user': 'User$2025'}
+
+
+@pytest.fixture
+def bd():
+    """BD vacía migrada con los tres usuarios base y dos libros."""
+    with sgb.app.app_context():
+        sgb.db.session.remove(); sgb.db.drop_all(); sgb.migrar_bd()
+        for username, role in (('admin', 'admin'), ('biblio', 'bibliotecario'), ('user', 'usuario')):
+            u = sgb.User(username=username, role=role); u.set_password(CREDENCIALES[username])
+            sgb.db.session.add(u)
+        sgb.db.session.add_all([sgb.Book(title="Cien Años de Soledad", author="Gabo", category="Novela", stock=5),
+                                sgb.Book(title="Clean Code", author="R. Martin", category="Tecnología", stock=2)])
+        sgb.db.session.commit()
+    sgb.cache_usuarios.entradas.clear(); sgb.cache_paginas.entradas.clear(); sgb.cache_paginas.bytes = 0
+    yield sgb
+    with sgb.app.app_context():
+        sgb.db.session.remove(); sgb.db.engine.dispose()
+
+
+def cliente(username='admin'):
+    c = sgb.app.test_client()
+    r = c.post('/login', data={'username': username, 'password': CREDENCIALES[username]})
+    assert r.status_code == 302
+    return c
@@ -0,0 +1,20 @@
+"""API JSON v1: los clientes sin navegador reciben siempre JSON, también en los errores."""
+from conftest import cliente
+
+
+def test_sin_sesion_la_api_responde_401_json(bd):
+    c = bd.app.test_client()
+    for metodo, ruta in (('get', '/api/v1/books'), ('get', '/api/v1/books/1'), ('post', '/api/v1/loans')):
+        r = getattr(c, metodo)(ruta)
+        assert r.status_code == 401 and r.is_json and r.get_json()['error']
+    r = c.get('/catalog')  # Las rutas HTML siguen redirigiendo al login
+    assert r.status_code == 302 and '/login?next=' in r.headers['Location']
+
+
+def test_libro_inexistente_404_json(bd):
+    c = cliente('user')
+    r = c.get('/api/v1/books/9999')
+    assert r.status_code == 404 and r.get_json() == {'error': 'Libro no encontrado.'}
+    assert 'ETag' not in r.headers
+    r = c.get('/api/v1/books/1')
+    assert r.status_code == 200 and r.get_json()['id'] == 1 and r.headers['ETag']
@@ -0,0 +1,41 @@
+"""Fotos de perfil: dos subidas seguidas del mismo usuario, procesadas en cualquier orden."""
+import hashlib
+import os
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from conftest import cliente
+
+
+def foto(color):
+    salida = BytesIO(); Image.new('RGB', (40, 30), color).save(salida, 'PNG')
+    return salida.getvalue()
+
+
+@pytest.fixture
+def trabajos(bd, monkeypatch):
+    """Sustituye el pool por una lista: la prueba decide en qué orden se ejecutan."""
+    pendientes = []
+    monkeypatch.setattr(bd._pool_avatares, 'submit', lambda f, *args: pendientes.append((f, args)))
+    return pendientes
+
+
+@pytest.mark.parametrize('orden', ['en_orden', 'invertido'])
+def test_la_ultima_subida_gana_aunque_termine_antes(bd, trabajos, orden):
+    c = cliente('user')
+    for color in ('red', 'blue'):
+        r = c.post('/profile', data={'profile_image': (BytesIO(foto(color)), 'foto.png')}, content_type='multipart/form-data')
+        assert r.status_code == 200
+    assert len(trabajos) == 2
+    for f, args in (trabajos if orden == 'en_orden' else trabajos[::-1]): f(*args)
+
+    vieja, nueva = (hashlib.sha256(foto(color)).hexdigest()[:16] for color in ('red', 'blue'))
+    with bd.app.app_context():
+        user = bd.User.query.filter_by(username='user').one()
+        assert user.profile_image == bd.nombre_avatar(user.id, nueva, bd.AVATAR_TAMANOS[0])
+        for lado in bd.AVATAR_TAMANOS:
+            carpeta = bd.app.config['UPLOAD_FOLDER']
+            assert os.path.exists(os.path.join(carpeta, bd.nombre_avatar(user.id, nueva, lado)))
+            assert not os.path.exists(os.path.join(carpeta, bd.nombre_avatar(user.id, vieja, lado)))
@@ -0,0 +1,54 @@
+"""El índice FTS5 sigue a la tabla book por triggers, sin llamadas explícitas de las rutas."""
+from sqlalchemy import delete, text, update
+
+from conftest import cliente
+
+
+def buscar(sgb, texto):
+    return sorted(b.title for b in sgb.filtrar_busqueda(sgb.Book.query, texto)[0])
+
+
+def test_libros_base_indexados_tras_crear_bd(bd):
+    with bd.app.app_context():
+        assert buscar(bd, 'anos') == ['Cien Años de Soledad']
+        assert buscar(bd, 'martin') == ['Clean Code']
+
+
+def test_altas_cambios_y_bajas_se_reflejan_en_el_indice(bd):
+    c = cliente('admin')
+    assert c.post('/staff/add_book', data={'title': 'Rayuela', 'author': 'Cortázar', 'category': 'Novela', 'stock': '2'}).status_code == 302
+    with bd.app.app_context():
+        assert buscar(bd, 'cortazar') == ['Rayuela']
+        libro = bd.Book.query.filter_by(title='Clean Code').one()
+        libro.title = 'Código Limpio'; bd.db.session.commit()
+        assert buscar(bd, 'clean') == [] and buscar(bd, 'codigo') == ['Código Limpio']
+        bd.db.session.execute(update(bd.Book).where(bd.Book.title == 'Rayuela').values(category='Clásicos'))
+        bd.db.session.commit()
+        assert buscar(bd, 'clasicos') == ['Rayuela']
+        bd.db.session.execute(delete(bd.Book).where(bd.Book.title == 'Rayuela')); bd.db.session.commit()
+        assert buscar(bd, 'cortazar') == []
+        reporte = bd.importar_libros(enumerate([{'title': 'Ficciones', 'author': 'Borges', 'stock': 1}], start=2))
+        assert reporte['libros_afectados'] == 1 and buscar(bd, 'borges') == ['Ficciones']
+        filas = bd.db.session.execute(text("SELECT count(*) FROM book_fts")).scalar()
+        assert filas == bd.Book.query.count()
+
+
+def test_migracion_8_crea_triggers_y_repara_el_indice(bd):
+    with bd.app.app_context():
+        for nombre in ('book_fts_ai', 'book_fts_ad', 'book_fts_au'):
+            bd.db.session.execute(text(f"DROP TRIGGER {nombre}"))
+        bd.db.session.execute(text("INSERT INTO book (title, author, stock, loan_count) VALUES ('Pedro Páramo', 'Rulfo', 1, 0)"))
+        bd.db.session.execute(delete(bd.SchemaVersion).where(bd.SchemaVersion.version >= 8))
+        bd.db.session.commit()
+        assert buscar(bd, 'rulfo') == []
+        assert bd.migrar_bd()[0] == 8
+        assert buscar(bd, 'rulfo') == ['Pedro Páramo']
+        bd.db.session.execute(delete(bd.Book).where(bd.Book.title == 'Pedro Páramo')); bd.db.session.commit()
+        assert buscar(bd, 'rulfo') == []
+
+
+def test_busqueda_sin_terminos_no_devuelve_el_catalogo(bd):
+    with bd.app.app_context():
+        for texto in ('!!!', '¿?', '  '):
+            assert buscar(bd, texto) == []
+    assert cliente('user').get('/catalog?q=!!!').get_data(as_text=True) == ''
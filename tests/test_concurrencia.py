@@ -0,0 +1,64 @@
+"""Prueba de estrés (S-08): muchos mostradores piden y devuelven el mismo libro a la vez
+sobre la BD SQLite en archivo. El stock nunca baja de cero ni se repone dos veces."""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import cliente
+
+HILOS = 16
+
+
+def en_paralelo(sgb, peticiones):
+    """Lanza cada petición (función cliente -> status) en su propio hilo, todas a la vez."""
+    c = cliente('biblio')
+    cookie = c.get_cookie('session').value
+    barrera = threading.Barrier(len(peticiones)); estados = [None] * len(peticiones)
+
+    def trabajo(i, peticion):
+        propio = sgb.app.test_client(); propio.set_cookie('session', cookie)
+        barrera.wait()
+        estados[i] = peticion(propio)
+    hilos = [threading.Thread(target=trabajo, args=(i, p)) for i, p in enumerate(peticiones)]
+    for h in hilos: h.start()
+    for h in hilos: h.join(timeout=60)
+    return estados
+
+
+def estado_libro(sgb, book_id):
+    with sgb.app.app_context():
+        sgb.db.session.remove()
+        stock = sgb.db.session.get(sgb.Book, book_id).stock
+        prestamos = sgb.Loan.query.filter_by(book_id=book_id).all()
+        return stock, prestamos
+
+
+@pytest.mark.parametrize('via', ['api', 'html'])
+def test_prestamos_y_devoluciones_concurrentes(bd, via):
+    with bd.app.app_context():
+        libro = bd.Book.query.filter_by(title='Cien Años de Soledad').one()
+        book_id, stock_inicial = libro.id, libro.stock
+        user_id = bd.User.query.filter_by(username='user').one().id
+    due = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
+
+    if via == 'api':
+        prestar = lambda c: c.post('/api/v1/loans', json={'book_id': book_id, 'user_id': user_id, 'due': due}).status_code
+    else:
+        prestar = lambda c: c.post(f'/prestar/{book_id}', data={'target_user_id': user_id, 'fecha_devolucion': due}).status_code
+    estados = en_paralelo(bd, [prestar] * HILOS)
+
+    stock, prestamos = estado_libro(bd, book_id)
+    assert stock == 0
+    assert len(prestamos) == stock_inicial
+    if via == 'api':
+        assert sorted(estados) == [201] * stock_inicial + [409] * (HILOS - stock_inicial)
+
+    # Cada préstamo se devuelve desde dos estaciones a la vez: sólo una lo cierra
+    devolver = [lambda c, i=p.id: c.post(f'/api/v1/loans/{i}/return', json={}).status_code for p in prestamos] * 2
+    estados = en_paralelo(bd, devolver)
+
+    stock, prestamos = estado_libro(bd, book_id)
+    assert stock == stock_inicial
+    assert all(p.actual_return_date is not None for p in prestamos)
+    assert sorted(estados) == [200] * stock_inicial + [409] * stock_inicial
@@ -0,0 +1,55 @@
+"""Préstamo y devolución en lote (/api/v1/loans/batch y /return_batch)."""
+from datetime import datetime, timedelta
+
+from conftest import cliente
+
+
+def estado(sgb, book_id):
+    with sgb.app.app_context():
+        sgb.db.session.remove()
+        libro = sgb.db.session.get(sgb.Book, book_id)
+        stats = {(s.scope, s.key): (s.loans, s.returns) for s in sgb.LoanStat.query.filter_by(period='total')}
+        return libro.stock, libro.loan_count, stats
+
+
+def test_prestamo_en_lote_todo_o_nada_por_libro(bd):
+    with bd.app.app_context():
+        cien = bd.Book.query.filter_by(title='Cien Años de Soledad').one()
+        clean = bd.Book.query.filter_by(title='Clean Code').one()
+        qr, cien_id, clean_id = bd.payload_qr(cien), cien.id, clean.id
+        user_id = bd.User.query.filter_by(username='user').one().id
+    due = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
+    # Cien Años: QR + id (2 ejemplares de 5). Clean Code: 3 escaneos con stock 2 -> ninguno.
+    items = [qr, cien_id, clean_id, clean_id, clean_id, 'xyz', 9999]
+    r = cliente('biblio').post('/api/v1/loans/batch', json={'user_id': user_id, 'due': due, 'items': items})
+    assert r.status_code == 200
+    datos = r.get_json()
+    assert (datos['ok'], datos['failed']) == (2, 5)
+    assert [i.get('error') for i in datos['items']] == [None, None] + ['Sin stock disponible.'] * 3 + ['Código no reconocido.', 'Libro no encontrado.']
+    assert len({i['loan_id'] for i in datos['items'][:2]}) == 2
+
+    stock, loan_count, stats = estado(bd, cien_id)
+    assert (stock, loan_count) == (3, 2)
+    assert stats[('book', str(cien_id))] == (2, 0) and stats[('user', str(user_id))] == (2, 0) and stats[('category', 'Novela')] == (2, 0)
+    stock, loan_count, stats = estado(bd, clean_id)
+    assert (stock, loan_count) == (2, 0) and ('book', str(clean_id)) not in stats
+
+
+def test_devolucion_en_lote_no_repone_dos_veces(bd):
+    with bd.app.app_context():
+        cien_id = bd.Book.query.filter_by(title='Cien Años de Soledad').one().id
+        user_id = bd.User.query.filter_by(username='user').one().id
+    c = cliente('biblio')
+    due = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
+    a, b = [i['loan_id'] for i in c.post('/api/v1/loans/batch', json={'user_id': user_id, 'due': due, 'items': [cien_id, cien_id]}).get_json()['items']]
+    assert c.post(f'/api/v1/loans/{b}/return', json={}).status_code == 200  # Otra estación se adelantó
+    assert estado(bd, cien_id)[0] == 4
+
+    r = c.post('/api/v1/loans/return_batch', json={'loan_ids': [a, a, b, 99999]})
+    datos = r.get_json()
+    assert (datos['ok'], datos['failed'], datos['fine_total']) == (1, 3, 0)
+    assert [i.get('error') for i in datos['items']] == [None, 'El préstamo ya había sido devuelto.',
+                                                         'El préstamo ya había sido devuelto.', 'Préstamo no encontrado.']
+    stock, loan_count, stats = estado(bd, cien_id)
+    assert (stock, loan_count) == (5, 2)
+    assert stats[('book', str(cien_id))] == (2, 2) and stats[('user', str(user_id))] == (2, 2)
@@ -0,0 +1,28 @@
+"""Migraciones sobre BD con datos previos (sección 8.1 de app.py)."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, text
+
+
+def test_fusion_de_duplicados_conserva_los_contadores_del_libro(bd):
+    with bd.app.app_context():
+        bd.db.session.execute(text("DROP INDEX uq_book_title_author"))
+        bd.db.session.execute(text("INSERT INTO book (title, author, category, stock, loan_count) VALUES "
+                                   "('Dup', 'A', 'Novela', 1, 1), ('Dup', 'A', 'Novela', 2, 2)"))
+        ids = [i for (i,) in bd.db.session.execute(text("SELECT id FROM book WHERE title = 'Dup' ORDER BY id"))]
+        user_id = bd.User.query.filter_by(username='user').one().id
+        ayer = datetime.now() - timedelta(days=1)
+        for book_id in (ids[0], ids[1], ids[1]):
+            bd.db.session.add(bd.Loan(book_id=book_id, user_id=user_id, loan_date=ayer, expected_return_date=ayer + timedelta(days=7)))
+        bd.db.session.commit()
+        bd.recalcular_estadisticas()
+        bd.db.session.execute(delete(bd.SchemaVersion).where(bd.SchemaVersion.version >= 3)); bd.db.session.commit()
+
+        assert bd.migrar_bd()[0] == 3
+        assert [b.id for b in bd.Book.query.filter_by(title='Dup')] == [ids[0]]
+        contadores = {(s.key, s.period): s.loans for s in bd.LoanStat.query.filter_by(scope='book')}
+        assert contadores[(str(ids[0]), 'total')] == 3
+        assert contadores[(str(ids[0]), ayer.strftime('%Y-%m-%d'))] == 3
+        assert not any(k == str(ids[1]) for k, _ in contadores)
+        top_books = bd.top_estadisticas(None)[0]
+        assert (top_books[0][0].id, top_books[0][1]) == (ids[0], 3)
@@ -0,0 +1,61 @@
+"""calcular_multas_lote (NumPy y respaldo sin NumPy) debe coincidir con calcular_multa_inteligente."""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import sgb
+
+LIMITE = datetime(2025, 3, 10)  # Medianoche, como las fechas de prestar()
+PRESTAMO = datetime(2025, 3, 1, 9, 15)
+
+
+def casos_borde():
+    casos = []
+    # Periodo de gracia: 1799 s no paga aunque la devolución sea muy tardía; 1800 s sí
+    for segundos in (0, 1, 1799, 1800, 1801):
+        casos.append((LIMITE + timedelta(days=5, hours=23, minutes=50), LIMITE + timedelta(days=5, hours=23, minutes=50, seconds=segundos), LIMITE))
+    # Fronteras de los tramos: días 0-1, 3/4 y 7/8 de mora, devueltos a distintas horas
+    for dias in (-2, 0, 1, 2, 3, 4, 5, 7, 8, 9, 30):
+        for hora in (timedelta(0), timedelta(seconds=1), timedelta(hours=12), timedelta(hours=23, minutes=59, seconds=59)):
+            casos.append((PRESTAMO, LIMITE + timedelta(days=dias) + hora, LIMITE))
+    # Fecha límite con hora distinta de medianoche: la mora se cuenta por fecha de calendario
+    limite_tarde = LIMITE.replace(hour=18, minute=30)
+    for devolucion in (limite_tarde + timedelta(hours=3), limite_tarde + timedelta(hours=6), limite_tarde + timedelta(days=3, hours=5, minutes=31)):
+        casos.append((PRESTAMO, devolucion, limite_tarde))
+    return casos
+
+
+def casos_aleatorios(n=2000, semilla=1234):
+    rnd = random.Random(semilla); casos = []
+    for _ in range(n):
+        prestamo = datetime(2025, 1, 1) + timedelta(seconds=rnd.randint(0, 300 * 86400), microseconds=rnd.randint(0, 999999))
+        limite = prestamo + timedelta(days=rnd.randint(1, 30), seconds=rnd.choice([0, rnd.randint(0, 86399)]))
+        devolucion = prestamo + timedelta(seconds=rnd.choice([rnd.randint(0, 3600), rnd.randint(0, 60 * 86400)]))
+        casos.append((prestamo, devolucion, limite))
+    return casos
+
+
+@pytest.fixture(params=['numpy', 'sin_numpy'])
+def lote(request, monkeypatch):
+    if request.param == 'numpy':
+        if sgb.np is None: pytest.skip('NumPy no instalado')
+    else: monkeypatch.setattr(sgb, 'np', None)
+    return sgb.calcular_multas_lote
+
+
+@pytest.mark.parametrize('casos', [casos_borde(), casos_aleatorios()], ids=['bordes', 'aleatorio'])
+def test_lote_coincide_con_calculo_escalar(lote, casos):
+    prestamos, devoluciones, limites = zip(*casos)
+    esperado = [sgb.calcular_multa_inteligente(p, d, l) for p, d, l in casos]
+    assert lote(list(prestamos), list(devoluciones), list(limites)) == esperado
+
+
+def test_tramos_y_gracia():
+    multa = sgb.calcular_multa_inteligente
+    fechas = lambda dias: (PRESTAMO, LIMITE + timedelta(days=dias, hours=10), LIMITE)
+    assert [multa(*fechas(d)) for d in (0, 1, 3, 4, 7, 8)] == [0, 200, 600, 1100, 2600, 3600]
+    devolucion = LIMITE + timedelta(days=8)
+    assert multa(devolucion - timedelta(seconds=1799), devolucion, LIMITE) == 0
+    assert multa(devolucion - timedelta(seconds=1800), devolucion, LIMITE) == 3600
+    assert sgb.calcular_multas_lote([], [], []) == []
@@ -0,0 +1,14 @@
+"""Instrumentación de consultas SQL (sección 3.4 de app.py)."""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+
+def test_consulta_fallida_no_deja_inicios_pendientes(bd):
+    with bd.app.app_context():
+        conexion = bd.db.session.connection()
+        for _ in range(3):
+            with pytest.raises(OperationalError): bd.db.session.execute(text("SELECT * FROM tabla_inexistente"))
+            bd.db.session.rollback(); conexion = bd.db.session.connection()
+        bd.db.session.execute(text("SELECT 1"))
+        assert conexion.info.get('_inicio_consulta') == []
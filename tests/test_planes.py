@@ -0,0 +1,18 @@
+"""EXPLAIN QUERY PLAN de las consultas calientes: ninguna recorre una tabla completa."""
+from datetime import datetime, timedelta
+
+
+def test_consultas_calientes_usan_indices(bd):
+    with bd.app.app_context():
+        user_id = bd.User.query.filter_by(username='user').one().id
+        libros = [b.id for b in bd.Book.query]
+        hace = datetime.now() - timedelta(days=40)
+        for k in range(30):
+            devuelto = hace + timedelta(days=k % 10) if k % 3 else None
+            bd.db.session.add(bd.Loan(book_id=libros[k % len(libros)], user_id=user_id, loan_date=hace + timedelta(days=k),
+                                      expected_return_date=hace + timedelta(days=k + 7), actual_return_date=devuelto))
+        bd.db.session.commit()
+        bd.recalcular_estadisticas()
+        resultados = bd.verificar_planes()
+        assert resultados
+        assert {nombre: problemas for nombre, _, problemas in resultados if problemas} == {}
@@ -0,0 +1,39 @@
+"""Etiquetas QR: PDF escrito página a página y limpieza de la caché de QR en disco."""
+import os
+
+from PIL import PdfParser
+
+from conftest import cliente
+
+
+def test_pdf_de_etiquetas_es_valido_y_pagina_por_hoja(bd):
+    with bd.app.app_context():
+        bd.db.session.add_all([bd.Book(title=f"Libro {i}", author="Autor", category="Serie", stock=1) for i in range(23)])
+        bd.db.session.commit()
+    r = cliente('biblio').get('/staff/qr_etiquetas')
+    assert r.status_code == 200 and r.mimetype == 'application/pdf'
+    pdf = PdfParser.PdfParser(buf=r.get_data())
+    assert len(pdf.pages) == 2  # 25 libros, 21 etiquetas por hoja
+    pagina = pdf.read_indirect(pdf.pages[0])
+    imagen = pdf.read_indirect(pagina[b'Resources'][b'XObject'][b'Im0'])
+    assert (imagen.dictionary.Width, imagen.dictionary.Height) == bd.HOJA_PX
+    assert len(imagen.decode()) == (bd.HOJA_PX[0] + 7) // 8 * bd.HOJA_PX[1]
+
+
+def test_limpiar_cache_qr_borra_huerfanos_y_respeta_el_tope(bd):
+    c = cliente('admin')
+    with bd.app.app_context():
+        ids = [b.id for b in bd.Book.query.order_by(bd.Book.id)]
+    for book_id in ids: assert c.get(f'/generar_qr/{book_id}').status_code == 200
+    with bd.app.app_context():
+        libro = bd.db.session.get(bd.Book, ids[0]); vieja = bd.CacheQR.clave(bd.payload_qr(libro))
+        libro.title = 'Cien Años de Soledad (ed. conmemorativa)'; bd.db.session.commit()
+        vigente = bd.CacheQR.clave(bd.payload_qr(bd.db.session.get(bd.Book, ids[1])))
+    assert os.path.exists(bd.cache_qr._ruta(vieja))
+
+    salida = bd.app.test_cli_runner().invoke(args=['limpiar-cache-qr']).output
+    assert 'eliminados' in salida
+    assert not os.path.exists(bd.cache_qr._ruta(vieja)) and os.path.exists(bd.cache_qr._ruta(vigente))
+
+    bd.app.test_cli_runner().invoke(args=['limpiar-cache-qr', '--max-mb', '0'])
+    assert not any(nombres for _, _, nombres in os.walk(bd.QR_CACHE_FOLDER))
@@ -0,0 +1,50 @@
+"""Recomendaciones por co-préstamo: job que llena user_reco y lectura por clave primaria."""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import sgb
+
+
+def historial_aleatorio(usuarios=60, libros=80, semilla=7):
+    rnd = random.Random(semilla)
+    return {u: rnd.sample(range(1, libros + 1), rnd.randint(1, 15)) for u in range(1, usuarios + 1)}
+
+
+def test_numpy_y_python_dan_las_mismas_listas():
+    if sgb.np is None: pytest.skip('NumPy no instalado')
+    historial = historial_aleatorio()
+    assert sgb._listas_numpy(historial) == sgb._listas_python(historial)
+
+
+def test_listas_excluyen_lo_leido_y_ordenan_por_similitud():
+    # 1 y 2 siempre van juntos; 3 aparece con 1 sólo una vez entre muchos lectores de 3
+    historial = {10: [1, 2], 11: [1, 2], 12: [1, 3], 13: [3, 4], 14: [3, 4], 15: [3], 16: [1]}
+    for calcular in ([sgb._listas_python] + ([sgb._listas_numpy] if sgb.np is not None else [])):
+        listas = calcular(historial)
+        assert listas[16] == [2, 3]
+        assert listas[10] == [3]
+        assert 1 not in listas[12] and 3 not in listas[12]
+
+
+def test_job_guarda_listas_y_el_dashboard_las_lee(bd):
+    with bd.app.app_context():
+        user = bd.User.query.filter_by(username='user').one()
+        otro = bd.User(username='lector', role='usuario'); otro.set_password('Lector$2025')
+        bd.db.session.add(otro)
+        libros = [bd.Book(title=f"Saga {i}", author="Autor", category="Saga", stock=3) for i in range(3)]
+        bd.db.session.add_all(libros); bd.db.session.commit()
+        ayer = datetime.now() - timedelta(days=1)
+        for u, b in ((otro, libros[0]), (otro, libros[1]), (otro, libros[2]), (user, libros[0])):
+            bd.db.session.add(bd.Loan(book_id=b.id, user_id=u.id, loan_date=ayer, expected_return_date=ayer + timedelta(days=7)))
+        bd.db.session.commit()
+        assert bd.recalcular_recomendaciones() == 1  # 'lector' ya leyó toda la saga
+        fila = bd.db.session.get(bd.UserRecommendation, user.id)
+        assert sorted(map(int, fila.book_ids.split(','))) == sorted([libros[1].id, libros[2].id])
+        assert [b.title for b in bd.recomendador.para_usuario(user.id)] == ['Saga 1', 'Saga 2']
+
+        # Un préstamo posterior al job se excluye desde la capa en memoria
+        bd.recomendador.registrar_prestamo(user.id, libros[1].id)
+        assert [b.title for b in bd.recomendador.para_usuario(user.id)] == ['Saga 2']
+        assert bd.recomendador.estadisticas()['usuarios'] == 1
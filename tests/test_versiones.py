@@ -0,0 +1,66 @@
+"""Las versiones por tabla viven en la BD: una escritura desde otro proceso invalida la caché
+de páginas y los ETag de la API de este proceso."""
+import os
+import subprocess
+import sys
+
+from sqlalchemy import event
+
+from conftest import CARPETA, RAIZ, cliente
+
+
+def importar_en_otro_proceso(contenido):
+    ruta = os.path.join(CARPETA, 'importacion.csv')
+    with open(ruta, 'w', encoding='utf-8') as f: f.write(contenido)
+    entorno = dict(os.environ, PYTHONPATH=RAIZ)
+    r = subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'importar-libros', ruta],
+                       cwd=CARPETA, env=entorno, capture_output=True, text=True, timeout=120)
+    assert r.returncode == 0, r.stderr
+
+
+def test_cache_de_paginas_ve_escrituras_de_otro_proceso(bd):
+    c = cliente('user')
+    primera = c.get('/catalog').data
+    assert c.get('/catalog').data == primera
+    assert bd.cache_paginas.hits == 1
+    importar_en_otro_proceso("title,author,category,stock\nLibro Nuevo,Autor,Ensayo,3\nClean Code,R. Martin,Tecnología,9\n")
+    pagina = c.get('/catalog').data.decode()
+    assert 'Libro Nuevo:3;' in pagina and 'Clean Code:11;' in pagina # La importación suma stock
+
+
+def test_etag_de_la_api_ve_escrituras_de_otro_proceso(bd):
+    c = cliente('user')
+    r = c.get('/api/v1/books')
+    etag = r.headers['ETag']
+    assert c.get('/api/v1/books', headers={'If-None-Match': etag}).status_code == 304
+    importar_en_otro_proceso("title,author,category,stock\nCien Años de Soledad,Gabo,Novela,4\n")
+    r = c.get('/api/v1/books', headers={'If-None-Match': etag})
+    assert r.status_code == 200
+    assert {b['title']: b['stock'] for b in r.json['items']}['Cien Años de Soledad'] == 9
+
+
+def test_version_sube_solo_tras_el_commit(bd):
+    with bd.app.app_context():
+        antes = bd.version_tablas('book')
+        libro = bd.db.session.get(bd.Book, 1); libro.stock = 1
+        bd.db.session.rollback()
+        assert bd.version_tablas('book') == antes # Sin commit no hay cambio de versión
+        libro = bd.db.session.get(bd.Book, 1); libro.stock = 1
+        bd.db.session.commit()
+        assert bd.version_tablas('book') != antes
+
+
+def test_version_no_se_escribe_en_la_transaccion_del_prestamo(bd):
+    """data_version se actualiza en otra conexión después del commit: la transacción de la
+    escritura nunca bloquea esa fila."""
+    sentencias = []
+    def anotar(conn, cursor, statement, *args): sentencias.append((conn.connection.dbapi_connection, statement))
+    with bd.app.app_context():
+        libro = bd.db.session.get(bd.Book, 1); libro.stock += 1
+        bd.db.session.flush()
+        propia = bd.db.session.connection().connection.dbapi_connection
+        event.listen(bd.db.engine, 'before_cursor_execute', anotar)
+        try: bd.db.session.commit()
+        finally: event.remove(bd.db.engine, 'before_cursor_execute', anotar)
+    upserts = [(c, s) for c, s in sentencias if 'data_version' in s]
+    assert upserts and all(c is not propia for c, _ in upserts)